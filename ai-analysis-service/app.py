@@ -4,18 +4,142 @@ Provides ML-powered solar panel performance predictions and recommendations
 """
 
 from flask import Flask, request, jsonify
-from flask_cors import CORS
-from ml_model import get_model
+from flask.json.provider import DefaultJSONProvider
+import logging
+import orjson
 import os
+import threading
 from dotenv import load_dotenv
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+# Micro-batch concurrent /api/ai_analysis requests into one vectorized model
+# call. Each request may wait up to MICRO_BATCH_MAX_LATENCY seconds for others
+# to join its batch, so this only pays off under concurrent load.
+MICRO_BATCH = os.getenv('MICRO_BATCH', 'False').lower() == 'true'
+MICRO_BATCH_SIZE = int(os.getenv('MICRO_BATCH_SIZE', 64))
+MICRO_BATCH_MAX_LATENCY = float(os.getenv('MICRO_BATCH_MAX_LATENCY', 0.01))
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """JSON provider backed by orjson, which is much faster than the stdlib encoder"""
+
+    option = orjson.OPT_SERIALIZE_NUMPY
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default, option=self.option).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        # Hand orjson's bytes straight to the response, skipping str decoding
+        obj = self._prepare_response_obj(args, kwargs)
+        data = orjson.dumps(obj, default=self.default, option=self.option)
+        return self._app.response_class(data, mimetype=self.mimetype)
+
+
 app = Flask(__name__)
-CORS(app)  # Enable CORS for frontend requests
+app.json = OrjsonProvider(app)
+
+
+# Enable CORS for frontend requests. Fixed headers for any origin are set
+# directly instead of through flask-cors to keep per-request overhead minimal.
+@app.before_request
+def cors_preflight():
+    """Answer CORS preflight requests without dispatching to a route"""
+    if request.method == 'OPTIONS':
+        return '', 204
+
+
+@app.after_request
+def add_cors_headers(response):
+    """Add CORS headers to every response"""
+    headers = response.headers
+    headers['Access-Control-Allow-Origin'] = '*'
+    headers['Access-Control-Allow-Methods'] = 'GET, POST, OPTIONS'
+    headers['Access-Control-Allow-Headers'] = 'Content-Type'
+    return response
+
+
+# ML model, loaded on first use so that importing the app (and serving
+# /health) never pays for importing NumPy and building the model.
+# wsgi.py calls load_model() so gunicorn --preload still builds it before forking.
+model = None
+
+
+def load_model():
+    """Get the ML model, importing and building it on first call"""
+    global model
+    if model is None:
+        from ml_model import get_model
+        model = get_model()
+    return model
+
+
+def predict_sites(inputs_list):
+    """
+    Run predictions for many sites with a single vectorized model call
+
+    Sites with non-numeric values are left out of the batch and predicted one
+    by one, so a malformed site only fails itself. If the batch itself fails
+    the error is logged and every site falls back to per-site prediction.
+    Failed sites are returned as the raised exception instead of a result dict.
+    """
+    from ml_model import Inputs
 
-# Initialize ML model
-model = get_model()
+    model = load_model()
+    results = [None] * len(inputs_list)
+
+    batch_idx = [i for i, inputs in enumerate(inputs_list) if Inputs.is_numeric(inputs)]
+    if batch_idx:
+        try:
+            batch = model.predict_batch([inputs_list[i] for i in batch_idx])
+            for i, result in zip(batch_idx, batch):
+                results[i] = result
+        except Exception:
+            logger.exception("Batch prediction failed, falling back to per-site prediction")
+
+    for i, inputs in enumerate(inputs_list):
+        if results[i] is None:
+            try:
+                results[i] = model.predict_output(inputs)
+            except Exception as e:
+                results[i] = e
+    return results
+
+
+# Seconds to wait for a micro-batched result (service_streamer's own default)
+MICRO_BATCH_TIMEOUT = 20
+
+_streamer = None
+_streamer_lock = threading.Lock()
+# ThreadedStreamer hands out task ids without locking, so submissions from
+# gthread worker threads must be serialized
+_submit_lock = threading.Lock()
+
+
+def get_streamer():
+    """
+    Get the micro-batching streamer for this process
+
+    Created on first use rather than at import, because its worker thread
+    would not survive gunicorn forking the preloaded app. service_streamer is
+    imported here too, since it pulls in redis, which only micro-batching needs.
+    """
+    global _streamer
+    if _streamer is None:
+        with _streamer_lock:
+            if _streamer is None:
+                from service_streamer import ThreadedStreamer
+                _streamer = ThreadedStreamer(
+                    predict_sites,
+                    batch_size=MICRO_BATCH_SIZE,
+                    max_latency=MICRO_BATCH_MAX_LATENCY
+                )
+    return _streamer
 
 
 @app.route('/health', methods=['GET'])
@@ -72,7 +196,15 @@ def analyze_performance():
                 }), 400
 
         # Run ML prediction
-        result = model.predict_output(inputs)
+        if MICRO_BATCH:
+            streamer = get_streamer()
+            with _submit_lock:
+                future = streamer.submit([inputs])
+            result = future.result(MICRO_BATCH_TIMEOUT)[0]
+            if isinstance(result, Exception):
+                raise result
+        else:
+            result = load_model().predict_output(inputs)
 
         # Add site_id to response
         result['site_id'] = site_id
@@ -109,22 +241,23 @@ def batch_analyze():
                 'error': 'Missing sites array in request body'
             }), 400
 
+        sites = data['sites']
+        predictions = predict_sites([site_data.get('inputs', {}) for site_data in sites])
+
         results = []
-        for site_data in data['sites']:
+        for site_data, result in zip(sites, predictions):
             site_id = site_data.get('site_id', 'unknown')
-            inputs = site_data.get('inputs', {})
 
-            try:
-                result = model.predict_output(inputs)
-                result['site_id'] = site_id
-                result['status'] = 'success'
-                results.append(result)
-            except Exception as e:
+            if isinstance(result, Exception):
                 results.append({
                     'site_id': site_id,
                     'status': 'error',
-                    'error': str(e)
+                    'error': str(result)
                 })
+            else:
+                result['site_id'] = site_id
+                result['status'] = 'success'
+                results.append(result)
 
         return jsonify({
             'results': results,
@@ -141,8 +274,9 @@ def batch_analyze():
 @app.route('/api/model_info', methods=['GET'])
 def model_info():
     """Get information about the ML model"""
+    model = load_model()
     return jsonify({
-        'model_type': 'Random Forest Regressor',
+        'model_type': 'PhysicsFormula',
         'features': model.feature_names,
         'feature_importance': model.feature_importance,
         'thresholds': model.thresholds,
@@ -155,8 +289,9 @@ if __name__ == '__main__':
     debug = os.getenv('DEBUG', 'False').lower() == 'true'
 
     print(f"🚀 AI Analysis Service starting on port {port}")
-    print(f"📊 ML Model: Random Forest Regressor")
-    print(f"🔬 Features: {len(model.feature_names)}")
+    print(f"📊 ML Model: Physics formula")
+    print(f"🔬 Features: {len(load_model().feature_names)}")
     print(f"✅ Ready to analyze solar performance!")
 
+    # Development server only - use gunicorn with wsgi:app in production
     app.run(host='0.0.0.0', port=port, debug=debug)
@@ -1,19 +1,218 @@
 """
 ML Model for Solar Panel Performance Prediction
-Uses Random Forest Regression to predict expected output and detect anomalies
+Uses a physics-based performance formula to predict expected output and detect anomalies
 """
 
 import numpy as np
-from sklearn.ensemble import RandomForestRegressor
-from typing import Dict, List, Tuple
+from functools import lru_cache
+from operator import itemgetter
+from typing import Dict, List, NamedTuple, Optional, Tuple
 import json
 
 
+class Inputs(NamedTuple):
+    """Model inputs parsed once from a request dict (units as in predict_output)"""
+    irradiance: float
+    ambient_temp: float
+    panel_temp: float
+    battery_soc: float
+    inverter_eff: float
+    soiling_index: float
+    tilt: float
+    azimuth: float
+    wind_speed: float
+    pr_baseline: float
+    system_capacity: float
+    actual_output: Optional[float]
+
+    @classmethod
+    def from_dict(cls, inputs: Dict) -> 'Inputs':
+        """Parse an inputs dict, filling in defaults for missing keys"""
+        # One C-level dict merge and multi-key lookup instead of a .get() per field
+        return cls._make(_get_input_fields({**INPUT_DEFAULTS, **inputs}))
+
+    @staticmethod
+    def is_numeric(inputs) -> bool:
+        """True if every known field is a number (actual_output may also be None)"""
+        if not isinstance(inputs, dict):
+            return False
+        for field in Inputs._fields:
+            value = inputs.get(field, 0)
+            if not isinstance(value, (int, float)) and not (field == 'actual_output' and value is None):
+                return False
+        return True
+
+
+# Defaults for inputs missing from a request
+INPUT_DEFAULTS = {
+    'irradiance': 0,
+    'ambient_temp': 25,
+    'panel_temp': 35,
+    'battery_soc': 70,
+    'inverter_eff': 96.0,
+    'soiling_index': 2.0,
+    'tilt': 30,
+    'azimuth': 180,
+    'wind_speed': 2.0,
+    'pr_baseline': 0.80,
+    'system_capacity': 100,  # kWp
+    'actual_output': None,
+}
+
+# Number of distinct inputs whose numeric results are memoized. Sensor readings
+# arrive at fixed register resolution, so repeats from a site are common.
+PREDICTION_CACHE_SIZE = 4096
+
+_get_input_fields = itemgetter(*Inputs._fields)
+
+
+def _output_kernel(irradiance, panel_temp, inverter_eff, soiling_index,
+                   pr_baseline, system_capacity, actual_output):
+    """
+    Scalar physics kernel: expected output, deviation and derating factors
+
+    Returns:
+        (predicted_output, deviation, temp_correction, soiling_factor,
+         inverter_factor, irradiance_factor)
+    """
+    # PV Output = Irradiance × System Capacity × PR × Temperature Correction × Soiling Factor × Inverter Efficiency
+
+    # Temperature derating (loses ~0.4% per °C above 25°C)
+    temp_correction = 1 - ((panel_temp - 25) * 0.004)
+    temp_correction = max(0.7, min(1.0, temp_correction))
+
+    # Soiling factor (soiling_index is % loss)
+    soiling_factor = 1 - (soiling_index / 100)
+
+    # Inverter efficiency factor
+    inverter_factor = inverter_eff / 100
+
+    # Standard Test Condition (STC) irradiance is 1000 W/m²
+    irradiance_factor = irradiance / 1000
+
+    predicted_output = (
+        system_capacity *
+        irradiance_factor *
+        pr_baseline *
+        temp_correction *
+        soiling_factor *
+        inverter_factor
+    )
+
+    # Deviation only applies when actual output is provided
+    deviation = 0
+    if actual_output is not None and predicted_output > 0:
+        deviation = ((actual_output - predicted_output) / predicted_output) * 100
+
+    return (predicted_output, deviation, temp_correction, soiling_factor,
+            inverter_factor, irradiance_factor)
+
+
+def _output_kernel_batch(irradiance, panel_temp, inverter_eff, soiling_index,
+                         pr_baseline, system_capacity, actual_output, has_actual):
+    """
+    Array version of _output_kernel over N sites
+
+    actual_output holds NaN where has_actual is False.
+    """
+    temp_correction = np.clip(1 - ((panel_temp - 25) * 0.004), 0.7, 1.0)
+    soiling_factor = 1 - (soiling_index / 100)
+    inverter_factor = inverter_eff / 100
+    irradiance_factor = irradiance / 1000
+
+    predicted_output = (
+        system_capacity *
+        irradiance_factor *
+        pr_baseline *
+        temp_correction *
+        soiling_factor *
+        inverter_factor
+    )
+
+    valid = has_actual & (predicted_output > 0)
+    safe_predicted = np.where(valid, predicted_output, 1.0)
+    deviation = np.where(valid, (actual_output - predicted_output) / safe_predicted * 100, 0.0)
+
+    return (predicted_output, deviation, temp_correction, soiling_factor,
+            inverter_factor, irradiance_factor)
+
+
+# Thresholds for fault detection
+THRESHOLDS = {
+    'panel_temp_high': 65,  # °C
+    'panel_temp_critical': 75,  # °C
+    'soiling_critical': 8.0,  # %
+    'inverter_eff_low': 94.0,  # %
+    'battery_soc_low': 20,  # %
+    'battery_soc_critical': 10,  # %
+    'deviation_warning': 10,  # %
+    'deviation_critical': 20,  # %
+}
+
+BASELINE_INVERTER_EFF = 96.5  # %
+
+# Recommendation rules as (priority, condition, message, action). condition and
+# message take (inputs, deviation). Rules are listed Critical > High > Medium >
+# Info so matches come out already in priority order without sorting.
+_RECOMMENDATION_RULES = (
+    # Critical
+    ('Critical',
+     lambda ip, dev: ip.panel_temp > THRESHOLDS['panel_temp_critical'],
+     lambda ip, dev: f'Panel over-temperature detected ({ip.panel_temp}°C). Immediate inspection required - possible hotspot or cooling issue.',
+     'Inspect panels for hotspots, check ventilation, consider tilt adjustment'),
+    ('Critical',
+     lambda ip, dev: ip.battery_soc < THRESHOLDS['battery_soc_critical'],
+     lambda ip, dev: f'Battery critically low ({ip.battery_soc}%). Risk of deep discharge damage.',
+     'Reduce load immediately or connect to grid if available'),
+
+    # High
+    ('High',
+     lambda ip, dev: THRESHOLDS['panel_temp_high'] < ip.panel_temp <= THRESHOLDS['panel_temp_critical'],
+     lambda ip, dev: f'Panel temperature elevated ({ip.panel_temp}°C vs ambient {ip.ambient_temp}°C). Monitor for efficiency loss.',
+     'Check for adequate airflow, clean panels if soiled'),
+    ('High',
+     lambda ip, dev: ip.soiling_index > THRESHOLDS['soiling_critical'],
+     lambda ip, dev: f'Heavy soiling detected ({ip.soiling_index}% loss). Cleaning recommended to restore efficiency.',
+     'Schedule panel cleaning service'),
+    ('High',
+     lambda ip, dev: ip.actual_output is not None and dev < -THRESHOLDS['deviation_critical'],
+     lambda ip, dev: f'Significant underperformance detected ({dev:.1f}% below expected). Multiple factors may be contributing.',
+     'Comprehensive system inspection recommended'),
+
+    # Medium
+    ('Medium',
+     lambda ip, dev: 4.0 < ip.soiling_index <= THRESHOLDS['soiling_critical'],
+     lambda ip, dev: f'Moderate soiling detected ({ip.soiling_index}% loss). Plan cleaning maintenance.',
+     'Add to maintenance schedule'),
+    ('Medium',
+     lambda ip, dev: ip.inverter_eff < THRESHOLDS['inverter_eff_low'],
+     lambda ip, dev: f'Inverter efficiency below baseline ({ip.inverter_eff}% vs {BASELINE_INVERTER_EFF}%, -{BASELINE_INVERTER_EFF - ip.inverter_eff:.1f}%).',
+     'Check inverter logs, inspect connections, verify AC voltage'),
+    ('Medium',
+     lambda ip, dev: THRESHOLDS['battery_soc_critical'] <= ip.battery_soc < THRESHOLDS['battery_soc_low'],
+     lambda ip, dev: f'Battery SoC low ({ip.battery_soc}%). Monitor charging conditions.',
+     'Check solar generation and load management'),
+    ('Medium',
+     lambda ip, dev: (ip.actual_output is not None and
+                      -THRESHOLDS['deviation_critical'] <= dev < -THRESHOLDS['deviation_warning']),
+     lambda ip, dev: f'Output below expected ({dev:.1f}%). Monitor for persistent issues.',
+     'Review system logs and sensor calibration'),
+
+    # Info
+    ('Info',
+     lambda ip, dev: ip.battery_soc >= THRESHOLDS['battery_soc_low'],
+     lambda ip, dev: f'Battery SoC stable ({ip.battery_soc}%). System operating normally.',
+     'Continue monitoring'),
+    ('Info',
+     lambda ip, dev: ip.irradiance < 200,
+     lambda ip, dev: f'Low irradiance conditions ({ip.irradiance} W/m²). Limited generation expected.',
+     'Normal for low-light conditions (dawn/dusk/cloudy)'),
+)
+
+
 class SolarPerformanceModel:
     def __init__(self):
         """Initialize the solar performance prediction model"""
-        # Pre-trained model coefficients (in production, load from file)
-        self.model = self._create_baseline_model()
         self.feature_names = [
             'irradiance', 'ambient_temp', 'panel_temp', 'battery_soc',
             'inverter_eff', 'soiling_index', 'tilt', 'azimuth',
@@ -34,27 +233,20 @@ class SolarPerformanceModel:
             'pr_baseline': 0.0
         }
 
+        # Top 3 factors by importance; immutable and shared by every result
+        self._top_factors = tuple(
+            name for name, _ in sorted(
+                self.feature_importance.items(),
+                key=lambda x: x[1],
+                reverse=True
+            )[:3]
+        )
+
         # Thresholds for fault detection
-        self.thresholds = {
-            'panel_temp_high': 65,  # °C
-            'panel_temp_critical': 75,  # °C
-            'soiling_critical': 8.0,  # %
-            'inverter_eff_low': 94.0,  # %
-            'battery_soc_low': 20,  # %
-            'battery_soc_critical': 10,  # %
-            'deviation_warning': 10,  # %
-            'deviation_critical': 20,  # %
-        }
+        self.thresholds = THRESHOLDS
 
-    def _create_baseline_model(self) -> RandomForestRegressor:
-        """Create a baseline Random Forest model with pre-trained weights"""
-        # In production, load from saved model file
-        model = RandomForestRegressor(
-            n_estimators=100,
-            max_depth=10,
-            random_state=42
-        )
-        return model
+        # Memoized numeric part of predict_output, keyed on the parsed Inputs
+        self._cached_metrics = lru_cache(maxsize=PREDICTION_CACHE_SIZE)(self._compute_metrics)
 
     def predict_output(self, inputs: Dict) -> Dict:
         """
@@ -79,223 +271,196 @@ class SolarPerformanceModel:
             Dictionary with prediction results and recommendations
         """
         # Extract features
-        irradiance = inputs.get('irradiance', 0)
-        ambient_temp = inputs.get('ambient_temp', 25)
-        panel_temp = inputs.get('panel_temp', 35)
-        battery_soc = inputs.get('battery_soc', 70)
-        inverter_eff = inputs.get('inverter_eff', 96.0)
-        soiling_index = inputs.get('soiling_index', 2.0)
-        tilt = inputs.get('tilt', 30)
-        azimuth = inputs.get('azimuth', 180)
-        wind_speed = inputs.get('wind_speed', 2.0)
-        pr_baseline = inputs.get('pr_baseline', 0.80)
-        system_capacity = inputs.get('system_capacity', 100)  # kWp
-        actual_output = inputs.get('actual_output', None)
-
-        # Calculate expected output using simplified physics-based model
-        # PV Output = Irradiance × System Capacity × PR × Temperature Correction × Soiling Factor × Inverter Efficiency
-
-        # Temperature derating (loses ~0.4% per °C above 25°C)
-        temp_correction = 1 - ((panel_temp - 25) * 0.004)
-        temp_correction = max(0.7, min(1.0, temp_correction))
+        ip = Inputs.from_dict(inputs)
+        actual_output = ip.actual_output
 
-        # Soiling factor (soiling_index is % loss)
-        soiling_factor = 1 - (soiling_index / 100)
-
-        # Inverter efficiency factor
-        inverter_factor = inverter_eff / 100
-
-        # Standard Test Condition (STC) irradiance is 1000 W/m²
-        irradiance_factor = irradiance / 1000
-
-        # Calculate predicted output
-        predicted_output = (
-            system_capacity *
-            irradiance_factor *
-            pr_baseline *
-            temp_correction *
-            soiling_factor *
-            inverter_factor
-        )
-
-        # Calculate deviation if actual output provided
-        deviation = 0
-        if actual_output is not None:
-            if predicted_output > 0:
-                deviation = ((actual_output - predicted_output) / predicted_output) * 100
-            else:
-                deviation = 0
-
-        # Calculate fault probability
-        fault_prob = self._calculate_fault_probability(inputs, deviation)
+        (predicted_output, deviation, fault_prob, temp_correction, soiling_factor,
+         inverter_factor, irradiance_factor, weather_impact,
+         battery_health) = self._cached_metrics(ip)
 
         # Get top influence factors
-        top_factors = self._get_top_influence_factors(inputs)
+        top_factors = self._get_top_influence_factors()
 
         # Generate recommendations
-        recommendations = self._generate_recommendations(inputs, deviation, actual_output)
-
-        # Weather impact score (based on irradiance variability and cloud coverage)
-        weather_impact = self._calculate_weather_impact(irradiance, wind_speed, ambient_temp)
-
-        # Battery health score
-        battery_health = self._calculate_battery_health(battery_soc, inputs)
+        recommendations = self._generate_recommendations(ip, deviation)
 
         return {
-            'predicted_output': round(predicted_output, 2),
+            'predicted_output': predicted_output,
             'actual_output': actual_output if actual_output is not None else predicted_output,
-            'deviation': round(deviation, 2),
-            'fault_prob': round(fault_prob, 3),
+            'deviation': deviation,
+            'fault_prob': fault_prob,
             'top_factors': top_factors,
             'recommendations': recommendations,
             'weather_impact_score': weather_impact,
             'battery_health_score': battery_health,
             'performance_metrics': {
-                'temp_correction': round(temp_correction, 3),
-                'soiling_factor': round(soiling_factor, 3),
-                'inverter_factor': round(inverter_factor, 3),
-                'irradiance_factor': round(irradiance_factor, 3),
+                'temp_correction': temp_correction,
+                'soiling_factor': soiling_factor,
+                'inverter_factor': inverter_factor,
+                'irradiance_factor': irradiance_factor,
             }
         }
 
-    def _calculate_fault_probability(self, inputs: Dict, deviation: float) -> float:
-        """Calculate probability of fault based on inputs and deviation"""
-        fault_score = 0
-
-        # High deviation increases fault probability
-        if abs(deviation) > self.thresholds['deviation_critical']:
-            fault_score += 0.4
-        elif abs(deviation) > self.thresholds['deviation_warning']:
-            fault_score += 0.2
-
-        # Panel temperature
-        panel_temp = inputs.get('panel_temp', 35)
-        if panel_temp > self.thresholds['panel_temp_critical']:
-            fault_score += 0.3
-        elif panel_temp > self.thresholds['panel_temp_high']:
-            fault_score += 0.1
-
-        # Soiling
-        soiling = inputs.get('soiling_index', 2)
-        if soiling > self.thresholds['soiling_critical']:
-            fault_score += 0.2
-
-        # Inverter efficiency
-        inverter_eff = inputs.get('inverter_eff', 96)
-        if inverter_eff < self.thresholds['inverter_eff_low']:
-            fault_score += 0.1
-
-        return min(1.0, fault_score)
-
-    def _get_top_influence_factors(self, inputs: Dict) -> List[str]:
-        """Get top 3 factors influencing performance"""
-        # Sort factors by importance
-        sorted_factors = sorted(
-            self.feature_importance.items(),
-            key=lambda x: x[1],
-            reverse=True
+    def _compute_metrics(self, ip: Inputs) -> Tuple[float, ...]:
+        """
+        Compute every numeric result of predict_output for one set of inputs
+
+        Called through self._cached_metrics, so repeated inputs skip the math.
+
+        Returns:
+            (predicted_output, deviation, fault_prob, temp_correction,
+             soiling_factor, inverter_factor, irradiance_factor,
+             weather_impact, battery_health)
+        """
+        # Calculate expected output using simplified physics-based model
+        (predicted_output, deviation, temp_correction, soiling_factor,
+         inverter_factor, irradiance_factor) = _output_kernel(
+            ip.irradiance, ip.panel_temp, ip.inverter_eff, ip.soiling_index,
+            ip.pr_baseline, ip.system_capacity, ip.actual_output
         )
-        return [factor[0] for factor in sorted_factors[:3]]
-
-    def _generate_recommendations(self, inputs: Dict, deviation: float, actual_output: float) -> List[Dict]:
-        """Generate actionable recommendations based on analysis"""
-        recommendations = []
-
-        panel_temp = inputs.get('panel_temp', 35)
-        ambient_temp = inputs.get('ambient_temp', 25)
-        soiling = inputs.get('soiling_index', 2)
-        inverter_eff = inputs.get('inverter_eff', 96)
-        battery_soc = inputs.get('battery_soc', 70)
-        irradiance = inputs.get('irradiance', 800)
-
-        # Panel temperature check
-        if panel_temp > self.thresholds['panel_temp_critical']:
-            recommendations.append({
-                'priority': 'Critical',
-                'msg': f'Panel over-temperature detected ({panel_temp}°C). Immediate inspection required - possible hotspot or cooling issue.',
-                'action': 'Inspect panels for hotspots, check ventilation, consider tilt adjustment'
-            })
-        elif panel_temp > self.thresholds['panel_temp_high']:
-            recommendations.append({
-                'priority': 'High',
-                'msg': f'Panel temperature elevated ({panel_temp}°C vs ambient {ambient_temp}°C). Monitor for efficiency loss.',
-                'action': 'Check for adequate airflow, clean panels if soiled'
-            })
 
-        # Soiling check
-        if soiling > self.thresholds['soiling_critical']:
-            recommendations.append({
-                'priority': 'High',
-                'msg': f'Heavy soiling detected ({soiling}% loss). Cleaning recommended to restore efficiency.',
-                'action': 'Schedule panel cleaning service'
-            })
-        elif soiling > 4.0:
-            recommendations.append({
-                'priority': 'Medium',
-                'msg': f'Moderate soiling detected ({soiling}% loss). Plan cleaning maintenance.',
-                'action': 'Add to maintenance schedule'
-            })
+        # Fault probability, accumulated branchlessly in integer tenths so the
+        # result is an exact one-decimal value (0.3, not 0.30000000000000004)
+        t = self.thresholds
+        abs_dev = abs(deviation)
+        fault_score = (
+            4 * (abs_dev > t['deviation_critical']) +
+            2 * (t['deviation_warning'] < abs_dev <= t['deviation_critical']) +
+            3 * (ip.panel_temp > t['panel_temp_critical']) +
+            1 * (t['panel_temp_high'] < ip.panel_temp <= t['panel_temp_critical']) +
+            2 * (ip.soiling_index > t['soiling_critical']) +
+            1 * (ip.inverter_eff < t['inverter_eff_low'])
+        )
+        fault_prob = min(10, fault_score) / 10
 
-        # Inverter efficiency check
-        baseline_eff = 96.5
-        eff_diff = baseline_eff - inverter_eff
-        if inverter_eff < self.thresholds['inverter_eff_low']:
-            recommendations.append({
-                'priority': 'Medium',
-                'msg': f'Inverter efficiency below baseline ({inverter_eff}% vs {baseline_eff}%, -{eff_diff:.1f}%).',
-                'action': 'Check inverter logs, inspect connections, verify AC voltage'
-            })
+        # Weather impact score (based on irradiance variability and cloud coverage)
+        weather_impact = self._calculate_weather_impact(ip)
 
-        # Battery SoC check
-        if battery_soc < self.thresholds['battery_soc_critical']:
-            recommendations.append({
-                'priority': 'Critical',
-                'msg': f'Battery critically low ({battery_soc}%). Risk of deep discharge damage.',
-                'action': 'Reduce load immediately or connect to grid if available'
-            })
-        elif battery_soc < self.thresholds['battery_soc_low']:
-            recommendations.append({
-                'priority': 'Medium',
-                'msg': f'Battery SoC low ({battery_soc}%). Monitor charging conditions.',
-                'action': 'Check solar generation and load management'
-            })
-        else:
-            recommendations.append({
-                'priority': 'Info',
-                'msg': f'Battery SoC stable ({battery_soc}%). System operating normally.',
-                'action': 'Continue monitoring'
-            })
+        # Battery health score
+        battery_health = self._calculate_battery_health(ip)
 
-        # Performance deviation check
-        if actual_output is not None and deviation < -self.thresholds['deviation_critical']:
-            recommendations.append({
-                'priority': 'High',
-                'msg': f'Significant underperformance detected ({deviation:.1f}% below expected). Multiple factors may be contributing.',
-                'action': 'Comprehensive system inspection recommended'
-            })
-        elif actual_output is not None and deviation < -self.thresholds['deviation_warning']:
-            recommendations.append({
-                'priority': 'Medium',
-                'msg': f'Output below expected ({deviation:.1f}%). Monitor for persistent issues.',
-                'action': 'Review system logs and sensor calibration'
-            })
+        return (predicted_output, deviation, fault_prob, temp_correction,
+                soiling_factor, inverter_factor, irradiance_factor,
+                weather_impact, battery_health)
+
+    def predict_batch(self, inputs_list: List[Dict]) -> List[Dict]:
+        """
+        Vectorized equivalent of predict_output for many sites at once
+
+        All sites are stacked into a single N x F matrix so the physics formula,
+        fault probability, weather and battery scores run as NumPy array ops.
+        Only the recommendations are still generated per site.
+
+        Args:
+            inputs_list: List of input dictionaries (same keys as predict_output)
+
+        Returns:
+            List of result dictionaries, in the same order as inputs_list
+        """
+        if not inputs_list:
+            return []
+
+        parsed = [Inputs.from_dict(d) for d in inputs_list]
+
+        # All numeric fields except actual_output, which may be None
+        X = np.array([ip[:-1] for ip in parsed], dtype=np.float64)
+        (irradiance, ambient_temp, panel_temp, battery_soc, inverter_eff,
+         soiling_index, tilt, azimuth, wind_speed, pr_baseline, system_capacity) = X.T
 
-        # Low irradiance info
-        if irradiance < 200:
-            recommendations.append({
-                'priority': 'Info',
-                'msg': f'Low irradiance conditions ({irradiance} W/m²). Limited generation expected.',
-                'action': 'Normal for low-light conditions (dawn/dusk/cloudy)'
+        actual = [ip.actual_output for ip in parsed]
+        has_actual = np.array([a is not None for a in actual])
+        actual_output = np.array([np.nan if a is None else a for a in actual], dtype=np.float64)
+
+        (predicted_output, deviation, temp_correction, soiling_factor,
+         inverter_factor, irradiance_factor) = _output_kernel_batch(
+            irradiance, panel_temp, inverter_eff, soiling_index,
+            pr_baseline, system_capacity, actual_output, has_actual
+        )
+
+        # Fault score in integer tenths, same formula as predict_output
+        t = self.thresholds
+        abs_dev = np.abs(deviation)
+        fault_score = (
+            4 * (abs_dev > t['deviation_critical']) +
+            2 * ((abs_dev > t['deviation_warning']) & (abs_dev <= t['deviation_critical'])) +
+            3 * (panel_temp > t['panel_temp_critical']) +
+            1 * ((panel_temp > t['panel_temp_high']) & (panel_temp <= t['panel_temp_critical'])) +
+            2 * (soiling_index > t['soiling_critical']) +
+            1 * (inverter_eff < t['inverter_eff_low'])
+        )
+        fault_prob = np.minimum(10, fault_score) / 10
+
+        irradiance_score = np.minimum(100, (irradiance / 1000) * 100)
+        wind_score = np.where(
+            (wind_speed >= 2) & (wind_speed <= 4),
+            100,
+            np.maximum(0, 100 - np.abs(wind_speed - 3) * 10)
+        )
+        temp_score = np.maximum(0, 100 - np.abs(ambient_temp - 25) * 2)
+        weather_impact = irradiance_score * 0.6 + wind_score * 0.2 + temp_score * 0.2
+
+        battery_health = np.select(
+            [
+                (battery_soc >= 30) & (battery_soc <= 80),
+                ((battery_soc >= 20) & (battery_soc < 30)) | ((battery_soc > 80) & (battery_soc <= 90)),
+            ],
+            [100.0, 95.0],
+            default=85.0
+        )
+
+        top_factors = self._get_top_influence_factors()
+
+        # Convert to Python floats once per column rather than once per cell
+        predicted_list = predicted_output.tolist()
+        deviation_list = deviation.tolist()
+        fault_list = fault_prob.tolist()
+        weather_list = weather_impact.tolist()
+        battery_list = battery_health.tolist()
+        temp_corr_list = temp_correction.tolist()
+        soiling_list = soiling_factor.tolist()
+        inverter_list = inverter_factor.tolist()
+        irradiance_list = irradiance_factor.tolist()
+
+        results = []
+        for i, ip in enumerate(parsed):
+            actual_i = actual[i]
+            results.append({
+                'predicted_output': predicted_list[i],
+                'actual_output': actual_i if actual_i is not None else predicted_list[i],
+                'deviation': deviation_list[i],
+                'fault_prob': fault_list[i],
+                'top_factors': top_factors,
+                'recommendations': self._generate_recommendations(ip, deviation_list[i]),
+                'weather_impact_score': weather_list[i],
+                'battery_health_score': battery_list[i],
+                'performance_metrics': {
+                    'temp_correction': temp_corr_list[i],
+                    'soiling_factor': soiling_list[i],
+                    'inverter_factor': inverter_list[i],
+                    'irradiance_factor': irradiance_list[i],
+                }
             })
 
-        # Sort by priority
-        priority_order = {'Critical': 0, 'High': 1, 'Medium': 2, 'Info': 3}
-        recommendations.sort(key=lambda x: priority_order.get(x['priority'], 4))
+        return results
+
+    def _get_top_influence_factors(self) -> Tuple[str, ...]:
+        """Get top 3 factors influencing performance (input-independent, computed once)"""
+        return self._top_factors
+
+    def _generate_recommendations(self, ip: Inputs, deviation: float) -> List[Dict]:
+        """Generate actionable recommendations based on analysis, highest priority first"""
+        recommendations = [
+            {'priority': priority, 'msg': message(ip, deviation), 'action': action}
+            for priority, condition, message, action in _RECOMMENDATION_RULES
+            if condition(ip, deviation)
+        ]
 
         return recommendations[:6]  # Return top 6 recommendations
 
-    def _calculate_weather_impact(self, irradiance: float, wind_speed: float, ambient_temp: float) -> float:
+    def _calculate_weather_impact(self, ip: Inputs) -> float:
         """Calculate weather impact score (0-100)"""
+        irradiance, wind_speed, ambient_temp = ip.irradiance, ip.wind_speed, ip.ambient_temp
+
         # Base score on irradiance (higher is better)
         irradiance_score = min(100, (irradiance / 1000) * 100)
 
@@ -312,28 +477,22 @@ class SolarPerformanceModel:
             temp_score * 0.2
         )
 
-        return round(weather_score, 1)
+        return weather_score
 
-    def _calculate_battery_health(self, soc: float, inputs: Dict) -> float:
+    def _calculate_battery_health(self, ip: Inputs) -> float:
         """Calculate battery health score (0-100)"""
+        soc = ip.battery_soc
+
         # Simple health metric based on SoC and cycling
         # In production, use historical cycling data
 
-        health_score = 100
-
-        # Penalize very low or very high SoC
-        if soc < 20 or soc > 95:
-            health_score -= 10
-
         # Optimal range is 30-80%
         if 30 <= soc <= 80:
-            health_score = 100
+            return 100.0
         elif 20 <= soc < 30 or 80 < soc <= 90:
-            health_score = 95
+            return 95.0
         else:
-            health_score = 85
-
-        return round(health_score, 1)
+            return 85.0
 
 
 # Singleton instance
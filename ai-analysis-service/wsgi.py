@@ -0,0 +1,16 @@
+"""
+WSGI entrypoint for production servers
+
+Run with gunicorn's --preload so the model is built once in the master
+process and shared with the workers:
+
+    gunicorn -w $(nproc) --preload --worker-class gthread --threads 4 -b 0.0.0.0:5001 wsgi:app
+"""
+
+from app import app, load_model
+
+# gunicorn loads wsgi:app
+__all__ = ['app']
+
+# Build the model at import time; with --preload this happens before forking
+load_model()
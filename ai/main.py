@@ -4,10 +4,15 @@ Provides power forecasting, anomaly detection, and image analysis
 """
 
 from fastapi import FastAPI, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
+from typing_extensions import TypedDict
 import numpy as np
+import os
+import zlib
 from datetime import datetime, timedelta
 import logging
 
@@ -18,7 +23,8 @@ logger = logging.getLogger(__name__)
 app = FastAPI(
     title="Solar AI Service",
     description="AI-powered analytics for solar installations",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
 # CORS middleware
@@ -32,7 +38,11 @@ app.add_middleware(
 
 # ==================== Data Models ====================
 
-class TimeSeriesPoint(BaseModel):
+# Per-point records are TypedDicts rather than BaseModels: pydantic-core
+# validates them straight into plain dicts, avoiding one model instance per
+# point on large requests.
+
+class TimeSeriesPoint(TypedDict):
     ts: str
     ghi_wm2: float
     air_temp_c: float
@@ -43,12 +53,15 @@ class ForecastRequest(BaseModel):
     data: List[TimeSeriesPoint]
     forecast_days: int = 7
 
+# Forecast and anomaly responses are returned as plain dicts; their models are
+# only used to document the OpenAPI schema, not to re-validate the output.
+
 class ForecastResponse(BaseModel):
     forecast: List[Dict[str, Any]]  # [{date, ac_kw_hat, lower_bound, upper_bound}]
     confidence: float
     model_used: str
 
-class AnomalyPoint(BaseModel):
+class AnomalyPoint(TypedDict):
     ts: str
     actual: float
     predicted: float
@@ -73,45 +86,58 @@ class ImageAnalysisResponse(BaseModel):
 
 # ==================== Helper Functions ====================
 
-def simple_seasonal_forecast(data: List[TimeSeriesPoint], forecast_days: int = 7):
+def to_columns(points: List[Dict[str, Any]], fields: Tuple[str, ...]) -> Dict[str, np.ndarray]:
+    """
+    Convert a list of points into one float64 NumPy column per field
+    Helpers work on these columns instead of iterating the points
+    """
+    count = len(points)
+    return {
+        field: np.fromiter((p[field] for p in points), dtype=np.float64, count=count)
+        for field in fields
+    }
+
+def simple_seasonal_forecast(columns: Dict[str, np.ndarray], last_ts: str, forecast_days: int = 7):
     """
     Simple seasonal forecasting using historical patterns
     Fallback when Chronos model is not available
+
+    Reads the 'ac_kw' column; last_ts is the timestamp of the final point.
     """
     try:
-        # Extract AC power values
-        ac_values = [p.ac_kw for p in data]
-        ghi_values = [p.ghi_wm2 for p in data]
-        temp_values = [p.air_temp_c for p in data]
+        ac_values = columns['ac_kw']
 
-        # Calculate daily patterns (24-hour cycles)
-        daily_pattern = []
-        for i in range(min(24, len(ac_values))):
-            hour_values = [ac_values[j] for j in range(i, len(ac_values), 24)]
-            daily_pattern.append(np.mean(hour_values) if hour_values else 0)
-
-        # Generate forecast
-        forecast = []
-        base_date = datetime.fromisoformat(data[-1].ts.replace('Z', '+00:00'))
-
-        for day in range(forecast_days):
-            date_str = (base_date + timedelta(days=day+1)).date().isoformat()
-
-            # Calculate daily total (sum of hourly pattern)
-            daily_total = sum(daily_pattern)
-
-            # Add some seasonal variation based on recent trend
-            recent_avg = np.mean(ac_values[-7*24:]) if len(ac_values) >= 7*24 else np.mean(ac_values)
-            adjustment = 0.95 + (np.random.random() * 0.1)  # ±5% variation
-
-            predicted = daily_total * adjustment
-
-            forecast.append({
-                "date": date_str,
-                "ac_kw_hat": round(max(0, predicted), 2),
-                "lower_bound": round(max(0, predicted * 0.85), 2),
-                "upper_bound": round(predicted * 1.15, 2)
-            })
+        # Average daily profile over the most recent whole days (24-hour cycles)
+        whole_days = len(ac_values) // 24
+        if whole_days:
+            daily_pattern = ac_values[-whole_days * 24:].reshape(-1, 24).mean(axis=0)
+        else:
+            daily_pattern = ac_values
+        daily_total = daily_pattern.sum()
+
+        # A negative horizon yields an empty forecast, as range() would
+        forecast_days = max(forecast_days, 0)
+
+        # Generate forecast with ±5% variation per day, seeded from the last
+        # timestamp so the same history always yields the same forecast
+        rng = np.random.default_rng(zlib.crc32(last_ts.encode()))
+        adjustment = 0.95 + rng.random(forecast_days) * 0.1
+        predicted = daily_total * adjustment
+
+        ac_kw_hat = np.maximum(0, predicted).tolist()
+        lower_bound = np.maximum(0, predicted * 0.85).tolist()
+        upper_bound = (predicted * 1.15).tolist()
+
+        base_date = datetime.fromisoformat(last_ts.replace('Z', '+00:00')).date()
+        forecast = [
+            {
+                "date": (base_date + timedelta(days=day + 1)).isoformat(),
+                "ac_kw_hat": ac_kw_hat[day],
+                "lower_bound": lower_bound[day],
+                "upper_bound": upper_bound[day]
+            }
+            for day in range(forecast_days)
+        ]
 
         return forecast, 0.78  # 78% confidence for simple model
 
@@ -125,37 +151,36 @@ def detect_anomalies_isolation_forest(residuals: List[AnomalyPoint]):
     Fallback when PyOD is not available
     """
     try:
-        # Calculate residuals
-        res_values = [abs(p.actual - p.predicted) for p in residuals]
-
-        if not res_values:
+        if not residuals:
             return [], 0.0
 
+        # Calculate residuals
+        count = len(residuals)
+        columns = to_columns(residuals, ('actual', 'predicted'))
+        res_values = np.abs(columns['actual'] - columns['predicted'])
+
         # Statistical outlier detection (IQR method)
-        q1 = np.percentile(res_values, 25)
-        q3 = np.percentile(res_values, 75)
+        q1, q3 = np.percentile(res_values, [25, 75])
         iqr = q3 - q1
         threshold = q3 + 1.5 * iqr
 
-        anomalies = []
-        anomaly_count = 0
+        mask = res_values > threshold
+        indices = np.nonzero(mask)[0].tolist()
+        scores = np.minimum(1.0, res_values[mask] / (threshold * 2)).tolist()
+        magnitudes = res_values[mask].tolist()
 
-        for i, point in enumerate(residuals):
-            residual = abs(point.actual - point.predicted)
+        anomalies = [
+            {
+                "start": residuals[i]['ts'],
+                "end": residuals[i]['ts'],
+                "score": score,
+                "type": "statistical_outlier",
+                "magnitude": magnitude
+            }
+            for i, score, magnitude in zip(indices, scores, magnitudes)
+        ]
 
-            if residual > threshold:
-                anomaly_count += 1
-                score = min(1.0, residual / (threshold * 2))
-
-                anomalies.append({
-                    "start": point.ts,
-                    "end": point.ts,
-                    "score": round(score, 3),
-                    "type": "statistical_outlier",
-                    "magnitude": round(residual, 2)
-                })
-
-        anomaly_rate = anomaly_count / len(residuals) if residuals else 0
+        anomaly_rate = len(indices) / count
 
         return anomalies, anomaly_rate
 
@@ -225,7 +250,7 @@ async def root():
 async def health_check():
     return {"status": "healthy", "timestamp": datetime.utcnow().isoformat()}
 
-@app.post("/forecast_power", response_model=ForecastResponse)
+@app.post("/forecast_power", responses={200: {"model": ForecastResponse}})
 async def forecast_power(request: ForecastRequest):
     """
     Forecast power generation for the next 7 days
@@ -239,19 +264,23 @@ async def forecast_power(request: ForecastRequest):
 
         # Use simple seasonal model (fallback)
         # In production, try to load Chronos-T5-tiny first
-        forecast, confidence = simple_seasonal_forecast(request.data, request.forecast_days)
-
-        return ForecastResponse(
-            forecast=forecast,
-            confidence=confidence,
-            model_used="seasonal_pattern"
+        # CPU-bound NumPy work runs in the threadpool so the event loop stays free
+        columns = await run_in_threadpool(to_columns, request.data, ('ac_kw',))
+        forecast, confidence = await run_in_threadpool(
+            simple_seasonal_forecast, columns, request.data[-1]['ts'], request.forecast_days
         )
 
+        return {
+            "forecast": forecast,
+            "confidence": confidence,
+            "model_used": "seasonal_pattern"
+        }
+
     except Exception as e:
         logger.error(f"Forecast error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/detect_anomalies", response_model=AnomalyResponse)
+@app.post("/detect_anomalies", responses={200: {"model": AnomalyResponse}})
 async def detect_anomalies(request: AnomalyRequest):
     """
     Detect anomalies in power generation using residual analysis
@@ -264,14 +293,16 @@ async def detect_anomalies(request: AnomalyRequest):
             raise HTTPException(status_code=400, detail="Need at least 7 data points")
 
         # Use statistical outlier detection (fallback)
-        anomalies, anomaly_rate = detect_anomalies_isolation_forest(request.residuals)
-
-        return AnomalyResponse(
-            anomalies=anomalies,
-            anomaly_rate=round(anomaly_rate, 3),
-            method="iqr_statistical"
+        anomalies, anomaly_rate = await run_in_threadpool(
+            detect_anomalies_isolation_forest, request.residuals
         )
 
+        return {
+            "anomalies": anomalies,
+            "anomaly_rate": anomaly_rate,
+            "method": "iqr_statistical"
+        }
+
     except Exception as e:
         logger.error(f"Anomaly detection error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -296,4 +327,12 @@ async def analyze_image(request: ImageAnalysisRequest):
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # One worker process per CPU: the forecast and anomaly helpers are CPU-bound
+    uvicorn.run(
+        "main:app",
+        host="0.0.0.0",
+        port=8000,
+        workers=int(os.getenv("WEB_CONCURRENCY", os.cpu_count() or 1)),
+        loop="uvloop",
+        http="httptools"
+    )